@@ -1,15 +1,26 @@
+import os
+import time
+
 import streamlit as st
 import pandas as pd
 
 # Module Imports
 from src.data_loader import DataLoader
 from src.preprocessor import DataPreprocessor
+from src.validator import SchemaValidationError
 from src.rfm_analysis import RFMAnalyzer
 from src.visualization import DashboardCharts
 from src.ai_models import CustomerSegmenterAI
-from src.insights_engine import generate_business_recommendations
+from src.insights_engine import generate_business_recommendations, generate_anomaly_insights
 from src.forecasting import TimeSeriesForecaster
+from src.anomaly_detection import AnomalyDetector
+from src.export_service import (
+    get_export_service, build_customer_export, build_forecast_export,
+    stream_export, export_filename, EXPORT_FORMATS, COMPRESSIONS
+)
 from src.ui_components import apply_custom_style
+from src.job_manager import get_job_manager, UploadJob
+from src.dataset_store import session_lease, file_fingerprint
 
 # Utilities
 from utils.constants import UI_TEXT, LANGUAGES
@@ -53,28 +64,73 @@ def main():
     # Toggle between Demo Data and User Upload
     use_demo = st.sidebar.checkbox("Use Enterprise Demo Data", value=True)
     
-    df = None
+    df_clean = None
+    cancellations = None
+    lease = None
     
     if use_demo:
         # Load local file with caching
         loader = DataLoader(DEFAULT_PATH)
-        df = loader.load_data()
+        
+        if os.path.exists(DEFAULT_PATH):
+            # --- ETL & Preprocessing ---
+            # Cleaned once per process and shared read-only by every session
+            lease = session_lease(file_fingerprint(DEFAULT_PATH))
+            def build_tables():
+                df = loader.load_data()
+                if df is None:
+                    return None
+                processor = DataPreprocessor(df)
+                return {"transactions": processor.preprocess(), "cancellations": processor.cancellations}
+            
+            try:
+                with st.spinner("🚀 AynovaX Engine is processing millions of records..."):
+                    tables = lease.tables(["transactions", "cancellations"], build_tables)
+            except SchemaValidationError as e:
+                st.error(f"{UI_TEXT['error_load'][lang_code]}{e}")
+                tables = None
+            if tables is not None:
+                df_clean, cancellations = tables["transactions"], tables["cancellations"]
+        else:
+            loader.load_data()  # Reports the missing demo file
     else:
-        # Allow user to upload their own ERP export
-        uploaded_file = st.sidebar.file_uploader("Upload ERP Export (CSV/XLSX)", type=['csv', 'xlsx'])
-        if uploaded_file:
-            st.info("Module ready for file processing.")
-            # In a production environment, we would handle the file buffer here.
-            pass 
+        # Allow user to upload their own ERP exports (parsed by the background worker pool)
+        uploaded_files = st.sidebar.file_uploader(
+            "Upload ERP Export (CSV/XLSX)", type=['csv', 'xlsx'], accept_multiple_files=True
+        )
+        if uploaded_files:
+            # Hash & submit the bytes once per upload; polling reruns only look the job up
+            upload_key = tuple(f.file_id for f in uploaded_files)
+            upload_state = st.session_state.get('upload_job')
+            job = None
+            if upload_state is not None and upload_state[0] == upload_key:
+                job = get_job_manager().get(upload_state[1])
+            if job is None:
+                job = get_job_manager().submit([(f.name, f.getvalue()) for f in uploaded_files])
+                st.session_state['upload_job'] = (upload_key, job.job_id)
+            
+            if job.status == UploadJob.FAILED:
+                st.error(f"{UI_TEXT['error_load'][lang_code]}{job.error}")
+            elif not job.finished:
+                # Stream progress back to this session without blocking other users
+                st.progress(job.progress, text=f"⏳ {job.message} — {job.rows_loaded:,} rows loaded")
+                time.sleep(0.5)
+                st.rerun()
+            else:
+                # The store takes ownership of the parsed tables (the job keeps only its status)
+                lease = session_lease(f"upload:{job.job_id}")
+                tables = lease.tables(
+                    ["transactions", "cancellations"], lambda: get_job_manager().take_result(job.job_id)
+                )
+                if tables is None:
+                    # Already handed over, then evicted from the store: parse the upload again
+                    get_job_manager().forget(job.job_id)
+                    st.session_state.pop('upload_job', None)
+                    st.rerun()
+                df_clean, cancellations = tables["transactions"], tables["cancellations"]
             
     # Proceed only if data is successfully loaded
-    if df is not None:
-        
-        # --- ETL & Preprocessing ---
-        # Using a spinner to indicate backend processing
-        with st.spinner("🚀 AynovaX Engine is processing millions of records..."):
-            processor = DataPreprocessor(df)
-            df_clean = processor.preprocess()
+    if df_clean is not None:
         
         # --- Main Dashboard Header ---
         st.title(f"📊 {UI_TEXT['app_title'][lang_code]}")
@@ -98,18 +154,30 @@ def main():
             "💡 Strategic Action Plan"
         ])
 
-        # Initialize core logic engines
+        # Export endpoint shared by all sessions (serves the cached tables published below)
+        export_registry, export_server = get_export_service()
+
+        # Initialize core logic engines (derived tables are shared across sessions via the lease)
         analyzer = RFMAnalyzer(df_clean)
-        rfm_df = analyzer.calculate_rfm_metrics()
+        rfm_df = lease.table("rfm", analyzer.calculate_rfm_metrics)
+        
+        # Anomaly detection (revenue, cancellations, data gaps, spend outliers)
+        detector = AnomalyDetector(df_clean, cancellations)
+        revenue_anomalies = lease.table("anomalies_revenue", detector.daily_revenue_anomalies)
+        cancellation_anomalies = lease.table("anomalies_cancellations", detector.cancellation_anomalies)
+        missing_months = lease.table("anomalies_missing_months", detector.missing_months)
+        spend_outliers = lease.table("anomalies_spend", lambda: detector.customer_spend_outliers(rfm_df))
 
         # ==========================================
         # TAB 1: EXECUTIVE DASHBOARD (RFM)
         # ==========================================
         with tab1:
             # Apply Scoring Rules
-            rfm_scored = analyzer.score_customers(rfm_df)
-            rfm_scored = analyzer.segment_customers(rfm_scored)
-            viz = DashboardCharts(rfm_scored)
+            rfm_scored = lease.table(
+                "rfm_scored",
+                lambda: analyzer.segment_customers(analyzer.score_customers(rfm_df.copy(deep=False)))
+            )
+            viz = DashboardCharts(rfm_scored, lang=lang_code)
             
             # KPI Row - Premium Style Metrics
             st.markdown("#### Key Performance Indicators")
@@ -145,12 +213,14 @@ def main():
                 k_clusters = st.slider("Target Clusters (k)", 2, 8, 4)
                 st.caption("Adjusting 'k' retrains the model instantly.")
             
-            # Train AI Model on the fly
+            # Train AI Model on the fly (once per k for this dataset)
             ai_model = CustomerSegmenterAI(rfm_df)
-            df_ai = ai_model.train_kmeans_model(n_clusters=k_clusters)
+            df_ai = lease.table(
+                f"clusters_k{k_clusters}", lambda: ai_model.train_kmeans_model(n_clusters=k_clusters)
+            )
             
             with col_ai_viz:
-                viz_ai = DashboardCharts(df_ai)
+                viz_ai = DashboardCharts(df_ai, lang=lang_code)
                 # Check if 3D method exists to avoid crashes
                 if hasattr(viz_ai, 'plot_3d_clusters'):
                     st.plotly_chart(viz_ai.plot_3d_clusters(df_ai), use_container_width=True)
@@ -167,13 +237,23 @@ def main():
             # Initialize Forecaster
             forecaster = TimeSeriesForecaster(df_clean)
             
+            # Daily series is aggregated once per dataset and shared with the model search
+            daily_sales = lease.table("daily_sales", forecaster.prepare_time_series)
+            
             # User Controls
             days_pred = st.slider("Forecast Horizon (Days)", 7, 90, 30)
+            auto_select = st.checkbox(
+                "Auto-select model (backtest Holt-Winters/ETS variants)", value=False,
+                help="Runs rolling-origin backtests over trend/damping/seasonality variants in parallel and keeps the most accurate."
+            )
             
             if st.button("Generate AI Forecast", type="primary"):
                 with st.spinner("Training Time Series Model..."):
                     # Execute prediction
-                    hist, pred = forecaster.forecast_sales(days_ahead=days_pred)
+                    hist, pred = forecaster.forecast_sales(
+                        days_ahead=days_pred, auto_select=auto_select, daily_sales=daily_sales
+                    )
+                    report = forecaster.model_report
                     
                     # Calculate projected revenue
                     total_pred = pred['Predicted_Sales'].sum()
@@ -181,9 +261,42 @@ def main():
                     # Display Result
                     st.success(f"Projected Revenue for next {days_pred} days: **${total_pred:,.2f}**")
                     
+                    # Backtest Accuracy
+                    config = report['config']
+                    model_name = f"trend={config['trend'] or 'none'}{' (damped)' if config['damped_trend'] else ''}, season={config['seasonal'] or 'none'}"
+                    if config['seasonal']:
+                        model_name += f"/{config['seasonal_periods']}d"
+                    fc1, fc2, fc3 = st.columns([2, 1, 1])
+                    fc1.metric("Model", model_name)
+                    fc2.metric("Backtest MAPE", f"{report['MAPE']:.1f}%")
+                    fc3.metric("Backtest MASE", f"{report['MASE']:.2f}")
+                    if 'candidates' in report:
+                        with st.expander("Model selection leaderboard"):
+                            st.dataframe(report['candidates'], use_container_width=True)
+                    
+                    # Publish for the export endpoint (downstream jobs pull it without rerunning)
+                    export_registry.publish(lease.fingerprint, f"forecast_{days_pred}d", build_forecast_export(pred))
+                    
                     # Visualize
                     fig_forecast = forecaster.plot_forecast(hist, pred)
                     st.plotly_chart(fig_forecast, use_container_width=True)
+            
+            # --- Anomaly Watch ---
+            st.markdown("---")
+            st.markdown("### 🚨 Anomaly Watch")
+            st.write("Streaming robust z-scores against a weekday baseline flag abnormal days as they arrive.")
+            
+            an1, an2, an3, an4 = st.columns(4)
+            an1.metric("Abnormal Revenue Days", f"{int(revenue_anomalies['Is_Anomaly'].sum()):,}")
+            an2.metric("Cancellation Surges", f"{int(cancellation_anomalies['Is_Anomaly'].sum()):,}")
+            an3.metric("Missing Months", f"{len(missing_months):,}")
+            an4.metric("Spend Outliers", f"{len(spend_outliers):,}")
+            
+            st.plotly_chart(detector.plot_anomalies(revenue_anomalies), use_container_width=True)
+            
+            flagged_days = revenue_anomalies[revenue_anomalies['Is_Anomaly']]
+            if not flagged_days.empty:
+                st.dataframe(flagged_days[['Direction', 'Value', 'Expected', 'Z_Score']], use_container_width=True)
 
         # ==========================================
         # TAB 4: STRATEGIC INSIGHTS (ACTION PLAN)
@@ -195,7 +308,7 @@ def main():
             # Ensure AI data exists if user jumps directly to Tab 4
             if 'df_ai' not in locals():
                 ai_model = CustomerSegmenterAI(rfm_df)
-                df_ai = ai_model.train_kmeans_model(n_clusters=4)
+                df_ai = lease.table("clusters_k4", lambda: ai_model.train_kmeans_model(n_clusters=4))
             
             # Generate Logic-based advice
             recommendations = generate_business_recommendations(df_ai)
@@ -215,6 +328,50 @@ def main():
                         <p style="font-size: 15px; color: #e0e0e0; line-height: 1.5;">{advice}</p>
                     </div>
                     """, unsafe_allow_html=True)
+            
+            # --- Export: segments & recommendations for CRM / downstream jobs ---
+            st.markdown("#### 📤 Export Results")
+            customers_export = lease.table(
+                f"export_customers_k{k_clusters}",
+                lambda: build_customer_export(rfm_scored, df_ai, recommendations)
+            )
+            # One table per k, so sessions on the same dataset with different k don't overwrite each other
+            export_table = f"customers_k{k_clusters}"
+            dataset_id = export_registry.publish(lease.fingerprint, export_table, customers_export)
+            
+            ex1, ex2, ex3 = st.columns([1, 1, 2])
+            export_fmt = ex1.selectbox("Format", list(EXPORT_FORMATS), key="export_fmt")
+            export_comp = ex2.selectbox("Compression", COMPRESSIONS, key="export_comp", disabled=export_fmt == "parquet")
+            with ex3:
+                st.write("")
+                st.download_button(
+                    f"⬇️ Download {len(customers_export):,} customers",
+                    # Generated only when clicked, chunk by chunk
+                    data=lambda: b"".join(stream_export(customers_export, export_fmt, export_comp)),
+                    file_name=export_filename("aynovax_customers", export_fmt, export_comp),
+                    mime=EXPORT_FORMATS[export_fmt][0]
+                )
+            if export_server is not None:
+                st.caption(
+                    f"API: `{export_server.url}/datasets/{dataset_id}/{export_table}?page=1&page_size=500` · "
+                    f"bulk: `{export_server.url}/datasets/{dataset_id}/{export_table}/export?format=parquet`"
+                )
+            
+            # Alert Cards from the Anomaly Detector
+            alerts = generate_anomaly_insights(revenue_anomalies, cancellation_anomalies, missing_months, spend_outliers)
+            if alerts:
+                st.markdown("#### 🚨 Anomaly Alerts")
+                a1, a2 = st.columns(2)
+                for i, (title, advice) in enumerate(alerts.items()):
+                    col = a1 if i % 2 == 0 else a2
+                    with col:
+                        st.markdown(f"""
+                        <div style="background-color: #262730; padding: 20px; border-radius: 10px; margin-bottom: 20px; border-left: 5px solid #e74c3c; box-shadow: 2px 2px 5px rgba(0,0,0,0.2);">
+                            <h3 style="margin-top:0; color: #fff;">{title}</h3>
+                            <p style="color: #e74c3c; font-size: 12px; font-weight: bold; text-transform: uppercase; letter-spacing: 1px;">Anomaly Detected</p>
+                            <p style="font-size: 15px; color: #e0e0e0; line-height: 1.5;">{advice}</p>
+                        </div>
+                        """, unsafe_allow_html=True)
 
     else:
         # Fallback if data is not loaded
@@ -37,7 +37,8 @@ class CustomerSegmenterAI:
         clusters = kmeans.fit_predict(X_scaled)
 
         # 4. Assign Clusters back to original DF
-        df_ai = self.rfm_df.copy()
+        # Shallow copy: shares the RFM columns instead of duplicating them
+        df_ai = self.rfm_df.copy(deep=False)
         df_ai['Cluster_AI'] = clusters
         
         # Determine which cluster is "Best" based on Monetary mean to label them logically
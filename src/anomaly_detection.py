@@ -0,0 +1,161 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from utils.constants import COL_MAPPING
+
+# Consistency constant: mean absolute deviation * 1.2533 ~ standard deviation (normal data)
+MEAN_ABS_DEV_TO_STD = 1.2533
+# Consistency constant: median absolute deviation * 1.4826 ~ standard deviation (normal data)
+MAD_TO_STD = 1.4826
+
+
+class StreamingAnomalyDetector:
+    """
+    Online detector for a daily metric (revenue, cancellations, ...).
+
+    Keeps an exponentially weighted baseline per weekday (level + weekly seasonality,
+    an incremental stand-in for STL) and an exponentially weighted absolute deviation of
+    the residuals. Each new day costs O(1): one expected value, one z-score, one update.
+    Residuals are clipped before updating the state so a spike cannot poison the baseline.
+    """
+
+    def __init__(self, season_length: int = 7, alpha: float = 0.1,
+                 threshold: float = 3.5, warmup_days: int = 28):
+        self.season_length = season_length
+        self.alpha = alpha
+        self.threshold = threshold
+        self.warmup_days = warmup_days
+        self.seasonal = np.full(season_length, np.nan)
+        self.abs_dev = 0.0
+        self.n_seen = 0
+
+    def update(self, date: pd.Timestamp, value: float) -> dict:
+        """Scores `value` against the current state, then folds it into the state."""
+        slot = date.dayofweek % self.season_length
+        expected = self.seasonal[slot]
+
+        if np.isnan(expected):
+            # First observation of this weekday: it seeds the baseline
+            self.seasonal[slot] = value
+            self.n_seen += 1
+            return {'Date': date, 'Value': value, 'Expected': value, 'Z_Score': 0.0, 'Is_Anomaly': False}
+
+        residual = value - expected
+        scale = MEAN_ABS_DEV_TO_STD * self.abs_dev
+        if scale > 0:
+            z = residual / scale
+        else:
+            z = 0.0 if residual == 0 else np.sign(residual) * np.inf
+        is_anomaly = self.n_seen >= self.warmup_days and abs(z) > self.threshold
+
+        # Robust update (Huber-style clipping at the threshold)
+        if scale > 0:
+            residual = float(np.clip(residual, -self.threshold * scale, self.threshold * scale))
+        self.seasonal[slot] = expected + self.alpha * residual
+        self.abs_dev += self.alpha * (abs(residual) - self.abs_dev)
+        self.n_seen += 1
+
+        return {'Date': date, 'Value': value, 'Expected': expected, 'Z_Score': z, 'Is_Anomaly': is_anomaly}
+
+    def run(self, series: pd.Series) -> pd.DataFrame:
+        """Feeds a daily series through the detector and returns one scored row per day."""
+        rows = [self.update(date, float(value)) for date, value in series.items()]
+        scored = pd.DataFrame(rows, columns=['Date', 'Value', 'Expected', 'Z_Score', 'Is_Anomaly']).astype(
+            {'Date': 'datetime64[ns]', 'Value': float, 'Expected': float, 'Z_Score': float, 'Is_Anomaly': bool}
+        )
+        scored['Direction'] = np.where(scored['Value'] >= scored['Expected'], 'Spike', 'Drop')
+        return scored.set_index('Date')
+
+
+class AnomalyDetector:
+    """
+    Flags spikes, drops and data-quality breaks in the cleaned transactions.
+    """
+
+    def __init__(self, df: pd.DataFrame, cancellations: pd.DataFrame = None):
+        self.df = df
+        self.cancellations = cancellations
+
+    def _daily(self, df: pd.DataFrame, column: str = None) -> pd.Series:
+        """Daily sum of `column` (or line count), resampled to a continuous calendar."""
+        dates = df[COL_MAPPING['invoice_date']].dt.normalize()
+        grouped = df.groupby(dates)
+        daily = grouped[column].sum() if column else grouped.size()
+        return daily.resample('D').sum()
+
+    def daily_revenue_anomalies(self, threshold: float = 3.5) -> pd.DataFrame:
+        """Scored daily revenue (same series the forecaster trains on)."""
+        daily = self._daily(self.df, 'TotalAmount')
+        return StreamingAnomalyDetector(threshold=threshold).run(daily)
+
+    def cancellation_anomalies(self, threshold: float = 3.5) -> pd.DataFrame:
+        """Scored daily count of cancelled lines; surges are invisible after preprocessing."""
+        if self.cancellations is None or self.cancellations.empty:
+            daily = pd.Series(dtype=float, index=pd.DatetimeIndex([]))
+        else:
+            daily = self._daily(self.cancellations)
+        return StreamingAnomalyDetector(threshold=threshold).run(daily)
+
+    def missing_months(self) -> pd.DataFrame:
+        """
+        Calendar months inside the data range with no transactions at all
+        (typically a batch export that was never uploaded).
+        """
+        months = self.df[COL_MAPPING['invoice_date']].dt.to_period('M')
+        present = pd.PeriodIndex(months.unique())
+        expected = pd.period_range(present.min(), present.max(), freq='M')
+        missing = expected.difference(present)
+        return pd.DataFrame({'Month': missing.astype(str)})
+
+    @staticmethod
+    def customer_spend_outliers(rfm_df: pd.DataFrame, threshold: float = 3.5) -> pd.DataFrame:
+        """
+        Vectorized robust z-score of customer spend (log scale, median/MAD).
+        Returns only the outlying customers, highest |z| first.
+        """
+        spend = np.log1p(rfm_df['Monetary'].clip(lower=0))
+        median = spend.median()
+        mad = (spend - median).abs().median()
+        scale = MAD_TO_STD * mad if mad > 0 else 1.0
+
+        scored = rfm_df[['CustomerID', 'Monetary']].assign(Spend_Z=(spend - median) / scale)
+        outliers = scored[scored['Spend_Z'].abs() > threshold]
+        return outliers.sort_values('Spend_Z', key=np.abs, ascending=False).reset_index(drop=True)
+
+    def plot_anomalies(self, scored: pd.DataFrame) -> go.Figure:
+        """
+        Daily revenue with its expected baseline and the flagged days highlighted.
+        """
+        fig = go.Figure()
+        flagged = scored[scored['Is_Anomaly']]
+
+        fig.add_trace(go.Scatter(
+            x=scored.index,
+            y=scored['Value'],
+            mode='lines',
+            name='Daily Revenue',
+            line=dict(color='#3498db', width=2)
+        ))
+        fig.add_trace(go.Scatter(
+            x=scored.index,
+            y=scored['Expected'],
+            mode='lines',
+            name='Expected Baseline',
+            line=dict(color='#95a5a6', width=1, dash='dot')
+        ))
+        fig.add_trace(go.Scatter(
+            x=flagged.index,
+            y=flagged['Value'],
+            mode='markers',
+            name='Anomaly',
+            marker=dict(color='#e74c3c', size=10, symbol='x')
+        ))
+
+        fig.update_layout(
+            title="Revenue Anomaly Watch",
+            xaxis_title="Date",
+            yaxis_title="Revenue ($)",
+            hovermode="x unified",
+            height=450
+        )
+        return fig
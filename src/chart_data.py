@@ -0,0 +1,84 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, List
+
+import pandas as pd
+import plotly.graph_objects as go
+
+
+def frame_fingerprint(df: pd.DataFrame, columns: List[str]) -> str:
+    """
+    Content hash of the given columns (vectorized row hashing, ~1ms for a customer-level table).
+    Charts key on the columns they read, so unrelated changes to the frame keep their cache entry.
+    """
+    row_hashes = pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+    digest = hashlib.sha1(row_hashes.tobytes())
+    digest.update(repr(columns).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ChartCache:
+    """
+    Process-wide LRU cache for the chart-data layer.
+
+    Holds two kinds of entries:
+    - small pre-aggregated frames (segment counts, revenue per segment), keyed on the data fingerprint;
+    - built plotly Figures, keyed on data fingerprint + layout params (chart, language, ...),
+      so a rerun with unchanged inputs skips plotly.express entirely.
+    Returned frames and figures are shared across sessions and must be treated as read-only.
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key: Hashable):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _put(self, key: Hashable, entry: dict):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def aggregate(self, key: Hashable, builder: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        entry = self._get(("aggregate", key))
+        if entry is None:
+            entry = {"frame": builder()}
+            self._put(("aggregate", key), entry)
+        return entry["frame"]
+
+    def figure(self, key: Hashable, builder: Callable[[], go.Figure]) -> go.Figure:
+        entry = self._get(("figure", key))
+        if entry is None:
+            entry = {"figure": builder()}
+            self._put(("figure", key), entry)
+        return entry["figure"]
+
+
+# Shared by every DashboardCharts instance (and therefore every session) in this process
+chart_cache = ChartCache()
+
+
+def segment_counts(df: pd.DataFrame, fingerprint: str) -> pd.DataFrame:
+    """Customer count per segment, computed once per dataset fingerprint."""
+    def build():
+        counts = df['Customer_Segment'].value_counts().reset_index()
+        counts.columns = ['Segment', 'Count']
+        return counts
+    return chart_cache.aggregate(("segment_counts", fingerprint), build)
+
+
+def segment_revenue(df: pd.DataFrame, fingerprint: str) -> pd.DataFrame:
+    """Total Monetary per segment, computed once per dataset fingerprint."""
+    return chart_cache.aggregate(
+        ("segment_revenue", fingerprint),
+        lambda: df.groupby('Customer_Segment')['Monetary'].sum().reset_index()
+    )
@@ -1,7 +1,7 @@
 import pandas as pd
 import streamlit as st
 import os
-from typing import Optional, List, Union
+from typing import Optional, List, Union, Iterator
 from streamlit.runtime.uploaded_file_manager import UploadedFile
 
 class DataLoader:
@@ -74,4 +74,18 @@ class DataLoader:
         elif filename.endswith('.xlsx'):
             return pd.read_excel(file_obj, engine='openpyxl')
         else:
-            raise ValueError("Unsupported format")
\ No newline at end of file
+            raise ValueError("Unsupported format")
+
+
+def iter_file_chunks(file_obj, filename: str, chunksize: int = 50_000) -> Iterator[pd.DataFrame]:
+    """
+    Streams a CSV/Excel source as successive DataFrame chunks.
+    CSV files are read incrementally so callers can report partial row counts;
+    Excel workbooks cannot be streamed by openpyxl and are yielded as a single chunk.
+    """
+    if filename.endswith('.csv'):
+        yield from pd.read_csv(file_obj, encoding='ISO-8859-1', chunksize=chunksize)
+    elif filename.endswith('.xlsx'):
+        yield pd.read_excel(file_obj, engine='openpyxl')
+    else:
+        raise ValueError("Unsupported format")
\ No newline at end of file
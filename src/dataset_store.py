@@ -0,0 +1,189 @@
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+import streamlit as st
+
+# Sessions receive shallow views of shared frames. Copy-on-Write guarantees a write
+# inside one session copies only the touched column instead of leaking into the store.
+# It is always on from pandas 3.0; older versions need the opt-in.
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+
+class _DatasetEntry:
+    """All tables derived from one dataset fingerprint, plus its session refcount."""
+
+    def __init__(self):
+        self.tables: Dict[str, pd.DataFrame] = {}
+        self.refcount = 0
+        # Guards `tables` / `build_locks` only; never held while a builder runs
+        self.lock = threading.Lock()
+        # One lock per group of table names built together
+        self.build_locks: Dict[tuple, threading.Lock] = {}
+
+    def views(self, names: List[str]) -> Optional[Dict[str, pd.DataFrame]]:
+        """Shallow views of `names`, or None if any of them is not built yet (caller holds `lock`)."""
+        if any(name not in self.tables for name in names):
+            return None
+        return {name: self.tables[name].copy(deep=False) for name in names}
+
+
+class DatasetLease:
+    """
+    A session's handle on a shared dataset.
+    Holding the lease keeps the dataset resident; it is released explicitly when the
+    session switches datasets, or automatically when the session state is garbage collected.
+    """
+
+    def __init__(self, store: "SharedDatasetStore", fingerprint: str):
+        self.fingerprint = fingerprint
+        self._store = store
+        self._finalizer = weakref.finalize(self, store._release, fingerprint)
+
+    def table(self, name: str, builder: Callable[[], Optional[pd.DataFrame]]) -> Optional[pd.DataFrame]:
+        """Returns a read-only view of table `name`, building it once per process if needed."""
+        return self._store.get_table(self.fingerprint, name, builder)
+
+    def tables(self, names: List[str],
+               builder: Callable[[], Optional[Dict[str, pd.DataFrame]]]) -> Optional[Dict[str, pd.DataFrame]]:
+        """Like `table`, for tables produced together by one builder (e.g. a preprocessing run)."""
+        return self._store.get_tables(self.fingerprint, names, builder)
+
+    def release(self):
+        self._finalizer()
+
+
+class SharedDatasetStore:
+    """
+    Process-wide, read-only store for cleaned transactions, RFM tables and cluster results.
+
+    Every Streamlit session runs as a thread of the same server process, so one resident
+    copy per dataset is enough: tables are built once, text columns are compacted into
+    Arrow-backed strings, and sessions get zero-copy shallow views. Datasets no session
+    holds a lease on are kept in a small LRU pool and evicted beyond `max_idle_datasets`.
+    Eviction listeners let other caches holding these tables (e.g. the export registry) drop them too.
+    """
+
+    def __init__(self, max_idle_datasets: int = 2):
+        self.max_idle_datasets = max_idle_datasets
+        self._entries: "OrderedDict[str, _DatasetEntry]" = OrderedDict()
+        self._listeners: List[Callable[[str], None]] = []
+        self._lock = threading.Lock()
+
+    def add_eviction_listener(self, callback: Callable[[str], None]):
+        """Registers `callback(fingerprint)`, called after a dataset is evicted."""
+        with self._lock:
+            self._listeners.append(callback)
+
+    def lease(self, fingerprint: str) -> DatasetLease:
+        with self._lock:
+            entry = self._entries.setdefault(fingerprint, _DatasetEntry())
+            entry.refcount += 1
+            self._entries.move_to_end(fingerprint)
+        return DatasetLease(self, fingerprint)
+
+    def get_table(self, fingerprint: str, name: str,
+                  builder: Callable[[], Optional[pd.DataFrame]]) -> Optional[pd.DataFrame]:
+        def build_one():
+            table = builder()
+            return None if table is None else {name: table}
+
+        views = self.get_tables(fingerprint, [name], build_one)
+        return None if views is None else views[name]
+
+    def get_tables(self, fingerprint: str, names: List[str],
+                   builder: Callable[[], Optional[Dict[str, pd.DataFrame]]]) -> Optional[Dict[str, pd.DataFrame]]:
+        with self._lock:
+            entry = self._entries.setdefault(fingerprint, _DatasetEntry())
+
+        # Already built: served without waiting for builds of other tables on this dataset
+        with entry.lock:
+            views = entry.views(names)
+            if views is not None:
+                return views
+            build_lock = entry.build_locks.setdefault(tuple(sorted(names)), threading.Lock())
+
+        # Per-table lock: concurrent sessions wait for a single build instead of duplicating it
+        with build_lock:
+            with entry.lock:
+                views = entry.views(names)
+            if views is not None:
+                return views
+
+            built = builder()
+            if built is None:
+                return None
+            frozen = {key: self._freeze(table) for key, table in built.items()}
+
+            with entry.lock:
+                for key, table in frozen.items():
+                    entry.tables.setdefault(key, table)
+                return entry.views(names)
+
+    def stats(self) -> Dict[str, int]:
+        """Refcount per resident dataset (for diagnostics)."""
+        with self._lock:
+            return {key: entry.refcount for key, entry in self._entries.items()}
+
+    def _release(self, fingerprint: str):
+        with self._lock:
+            entry = self._entries.get(fingerprint)
+            if entry is None:
+                return
+            entry.refcount = max(entry.refcount - 1, 0)
+            evicted = self._evict()
+            listeners = list(self._listeners)
+
+        # Outside the lock: listeners may take their own locks
+        for fingerprint in evicted:
+            for callback in listeners:
+                callback(fingerprint)
+
+    def _evict(self) -> List[str]:
+        """Drops the least recently leased idle datasets once the idle pool is full."""
+        idle = [key for key, entry in self._entries.items() if entry.refcount == 0]
+        evicted = []
+        while len(idle) > self.max_idle_datasets:
+            key = idle.pop(0)
+            self._entries.pop(key)
+            evicted.append(key)
+        return evicted
+
+    @staticmethod
+    def _freeze(df: pd.DataFrame) -> pd.DataFrame:
+        """Converts object text columns to immutable Arrow strings (far smaller than Python str objects)."""
+        text_cols = [col for col in df.columns if df[col].dtype == object]
+        if not text_cols:
+            return df
+        arrow_str = pd.StringDtype("pyarrow")
+        return df.astype({col: arrow_str for col in text_cols})
+
+
+@st.cache_resource(show_spinner=False)
+def get_dataset_store() -> SharedDatasetStore:
+    """Single dataset store shared by every Streamlit session in this process."""
+    return SharedDatasetStore()
+
+
+def file_fingerprint(path: str) -> str:
+    """Fingerprint for a local file: changes whenever the file is replaced or edited."""
+    stat = os.stat(path)
+    return f"file:{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def session_lease(fingerprint: str) -> DatasetLease:
+    """
+    Returns this session's lease on `fingerprint`, releasing any lease it held on a
+    previous dataset so the store can evict it.
+    """
+    lease = st.session_state.get('dataset_lease')
+    if lease is None or lease.fingerprint != fingerprint:
+        if lease is not None:
+            lease.release()
+        lease = get_dataset_store().lease(fingerprint)
+        st.session_state['dataset_lease'] = lease
+    return lease
@@ -0,0 +1,288 @@
+import hashlib
+import io
+import json
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import streamlit as st
+
+from src.dataset_store import get_dataset_store
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", ".csv"),
+    "jsonl": ("application/x-ndjson", ".jsonl"),
+    "parquet": ("application/vnd.apache.parquet", ".parquet"),
+}
+# CSV/JSONL are gzip-streamed; Parquet compresses each column chunk internally
+COMPRESSIONS = ("none", "gzip")
+
+
+def build_customer_export(rfm_scored: pd.DataFrame, df_ai: pd.DataFrame, recommendations: dict) -> pd.DataFrame:
+    """
+    One row per customer: RFM values and scores, rule-based segment, AI cluster and its recommendation.
+    """
+    rfm_cols = ['CustomerID', 'Recency', 'Frequency', 'Monetary', 'R_Score', 'F_Score', 'M_Score',
+                'RFM_Segment', 'RFM_Score', 'Customer_Segment']
+    customers = rfm_scored[rfm_cols].merge(df_ai[['CustomerID', 'Cluster_Label']], on='CustomerID', how='left')
+    customers['Recommendation'] = customers['Cluster_Label'].map(recommendations)
+    return customers
+
+
+def build_forecast_export(forecast: pd.DataFrame) -> pd.DataFrame:
+    """Forecast frame (Date index) as a flat table."""
+    return forecast.reset_index()
+
+
+class _DrainableSink(io.RawIOBase):
+    """Write-only sink that hands out what was written so far, while keeping the absolute position."""
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+def _encode_chunks(df: pd.DataFrame, fmt: str, chunk_size: int) -> Iterator[bytes]:
+    """Serializes `df` slice by slice; only one chunk is ever materialized."""
+    if fmt == "parquet":
+        sink = _DrainableSink()
+        # Object columns of an empty slice are typed `null`, so the schema comes from the
+        # first chunk; the empty slice is only used for a frame without rows
+        first = df.iloc[:chunk_size]
+        schema = pa.Schema.from_pandas(first, preserve_index=False)
+        with pq.ParquetWriter(sink, schema, compression="zstd") as writer:
+            for start in range(0, len(df), chunk_size):
+                chunk = pa.Table.from_pandas(df.iloc[start:start + chunk_size], schema=schema, preserve_index=False)
+                writer.write_table(chunk)
+                yield sink.drain()
+        yield sink.drain()  # footer
+        return
+
+    for start in range(0, len(df), chunk_size):
+        chunk = df.iloc[start:start + chunk_size]
+        if fmt == "csv":
+            yield chunk.to_csv(index=False, header=(start == 0)).encode("utf-8")
+        else:
+            yield chunk.to_json(orient="records", lines=True, date_format="iso").encode("utf-8")
+    if len(df) == 0:
+        # Always yield at least one chunk (CSV keeps its header line)
+        yield df.to_csv(index=False).encode("utf-8") if fmt == "csv" else b""
+
+
+def stream_export(df: pd.DataFrame, fmt: str = "csv", compression: str = "none",
+                  chunk_size: int = 50_000) -> Iterator[bytes]:
+    """
+    Streams `df` as CSV / JSONL / Parquet bytes in chunks of `chunk_size` rows, in constant memory.
+    `compression='gzip'` wraps CSV/JSONL in a streaming gzip encoder (ignored for Parquet).
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format '{fmt}'. Use one of: {', '.join(EXPORT_FORMATS)}")
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unsupported compression '{compression}'. Use one of: {', '.join(COMPRESSIONS)}")
+
+    if compression == "none" or fmt == "parquet":
+        yield from _encode_chunks(df, fmt, chunk_size)
+        return
+
+    encoder = zlib.compressobj(wbits=31)  # 31 = gzip container
+    for data in _encode_chunks(df, fmt, chunk_size):
+        compressed = encoder.compress(data)
+        if compressed:
+            yield compressed
+    yield encoder.flush()
+
+
+def export_filename(name: str, fmt: str, compression: str = "none") -> str:
+    suffix = EXPORT_FORMATS[fmt][1]
+    if compression == "gzip" and fmt != "parquet":
+        suffix += ".gz"
+    return f"{name}{suffix}"
+
+
+def export_to_file(df: pd.DataFrame, path: str, fmt: str = "csv", compression: str = "none",
+                   chunk_size: int = 50_000) -> str:
+    """Writes the chunked export stream to `path` (for scheduled CRM pushes)."""
+    with open(path, "wb") as handle:
+        for data in stream_export(df, fmt, compression, chunk_size):
+            handle.write(data)
+    return path
+
+
+class ExportRegistry:
+    """
+    Tables published for download, grouped by dataset.
+    Holds references to the shared (read-only) tables, so publishing copies nothing.
+    Datasets are dropped when the dataset store evicts them, and the least recently
+    published ones beyond `max_datasets` are dropped as well.
+    """
+
+    def __init__(self, max_datasets: int = 8):
+        self.max_datasets = max_datasets
+        self._tables: "OrderedDict[str, Dict[str, pd.DataFrame]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def dataset_id(fingerprint: str) -> str:
+        """Short, URL-safe id for a dataset fingerprint."""
+        return hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()[:12]
+
+    def publish(self, fingerprint: str, name: str, table: pd.DataFrame) -> str:
+        dataset = self.dataset_id(fingerprint)
+        with self._lock:
+            self._tables.setdefault(dataset, {})[name] = table
+            self._tables.move_to_end(dataset)
+            while len(self._tables) > self.max_datasets:
+                self._tables.popitem(last=False)
+        return dataset
+
+    def drop(self, fingerprint: str):
+        """Forgets every table published for `fingerprint` (dataset store eviction hook)."""
+        with self._lock:
+            self._tables.pop(self.dataset_id(fingerprint), None)
+
+    def get(self, dataset: str, name: str) -> Optional[pd.DataFrame]:
+        with self._lock:
+            return self._tables.get(dataset, {}).get(name)
+
+    def describe(self) -> dict:
+        with self._lock:
+            return {
+                "datasets": {
+                    dataset: {name: len(table) for name, table in tables.items()}
+                    for dataset, tables in self._tables.items()
+                },
+            }
+
+
+class _ExportRequestHandler(BaseHTTPRequestHandler):
+    """
+    GET /datasets                               -> published datasets and row counts
+    GET /datasets/<id>/<table>?page=&page_size= -> paginated JSON rows
+    GET /datasets/<id>/<table>/export?format=csv|jsonl|parquet&compression=none|gzip
+                                                -> streamed file
+    """
+
+    registry: ExportRegistry = None
+    max_page_size = 10_000
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = [part for part in url.path.split("/") if part]
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        try:
+            if parts == ["datasets"]:
+                return self._send_json(200, self.registry.describe())
+            if len(parts) in (3, 4) and parts[0] == "datasets":
+                table = self.registry.get(parts[1], parts[2])
+                if table is None:
+                    return self._send_json(404, {"error": f"Table '{parts[2]}' not found for dataset '{parts[1]}'"})
+                if len(parts) == 3:
+                    return self._send_page(table, parts[2], query)
+                if parts[3] == "export":
+                    return self._send_export(table, parts[2], query)
+            return self._send_json(404, {"error": "Unknown endpoint"})
+        except ValueError as e:
+            return self._send_json(400, {"error": str(e)})
+
+    def _send_page(self, table: pd.DataFrame, name: str, query: dict):
+        page = int(query.get("page", 1))
+        page_size = int(query.get("page_size", 500))
+        if page < 1 or not 1 <= page_size <= self.max_page_size:
+            raise ValueError(f"page must be >= 1 and page_size between 1 and {self.max_page_size}")
+
+        start = (page - 1) * page_size
+        rows = table.iloc[start:start + page_size]
+        self._send_json(200, {
+            "table": name,
+            "page": page,
+            "page_size": page_size,
+            "total_rows": len(table),
+            "total_pages": -(-len(table) // page_size),
+            "rows": json.loads(rows.to_json(orient="records", date_format="iso")),
+        })
+
+    def _send_export(self, table: pd.DataFrame, name: str, query: dict):
+        fmt = query.get("format", "csv")
+        compression = query.get("compression", "none")
+        stream = stream_export(table, fmt, compression)
+        first = next(stream, b"")  # validates arguments before headers are sent
+
+        # HTTP/1.0 without Content-Length: the body ends when the connection closes
+        self.send_response(200)
+        self.send_header("Content-Type", EXPORT_FORMATS[fmt][0])
+        self.send_header("Content-Disposition", f'attachment; filename="{export_filename(name, fmt, compression)}"')
+        self.end_headers()
+        self.wfile.write(first)
+        for data in stream:
+            self.wfile.write(data)
+
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Keep the Streamlit console clean
+        pass
+
+
+class ExportServer:
+    """Small local HTTP server exposing the registry, running on a daemon thread."""
+
+    def __init__(self, registry: ExportRegistry, host: str = "127.0.0.1", port: int = 8765):
+        handler = type("ExportRequestHandler", (_ExportRequestHandler,), {"registry": registry})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.host, self.port = self.httpd.server_address[:2]
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="aynovax-export", daemon=True)
+        self.thread.start()
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def shutdown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@st.cache_resource(show_spinner=False)
+def get_export_service() -> Tuple[ExportRegistry, Optional[ExportServer]]:
+    """
+    Registry + HTTP endpoint shared by every Streamlit session in this process.
+    The port comes from AYNOVAX_EXPORT_PORT (default 8765); if it is taken, only the registry is available.
+    """
+    registry = ExportRegistry()
+    get_dataset_store().add_eviction_listener(registry.drop)
+    try:
+        server = ExportServer(registry, port=int(os.environ.get("AYNOVAX_EXPORT_PORT", 8765)))
+    except OSError:
+        server = None
+    return registry, server
@@ -1,9 +1,171 @@
+import hashlib
+import multiprocessing
+import os
+import threading
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional
+
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
 from statsmodels.tsa.holtwinters import ExponentialSmoothing
 from utils.constants import COL_MAPPING
 
+# Default configuration (weekly seasonality, additive trend and season)
+DEFAULT_ETS_CONFIG = {'trend': 'add', 'damped_trend': False, 'seasonal': 'add', 'seasonal_periods': 7}
+
+# Winning configuration per (series content, horizon), shared by every session in the process
+_SELECTION_CACHE: Dict[tuple, dict] = {}
+_SELECTION_LOCK = threading.Lock()
+_POOL: Optional[ProcessPoolExecutor] = None
+
+
+# Shortest training window a backtest fold may use: two weekly cycles plus one day
+MIN_TRAIN_DAYS = 2 * 7 + 1
+# Seasonal-naive lag for the MASE scale, shared by every candidate so their scores are comparable
+MASE_SEASON = 7
+
+
+def backtest_folds(n_obs: int, horizon: int, max_folds: int = 3) -> int:
+    """Number of rolling-origin folds that still leave MIN_TRAIN_DAYS of history in the first one."""
+    return max(1, min(max_folds, (n_obs - MIN_TRAIN_DAYS) // horizon))
+
+
+def mase_scale(values: np.ndarray, horizon: int, n_folds: int) -> float:
+    """
+    In-sample seasonal-naive (lag MASE_SEASON) mean absolute error of the first fold's
+    training window. Computed once per series and used for every candidate.
+    """
+    train = values[:len(values) - n_folds * horizon]
+    if len(train) <= MASE_SEASON:
+        return np.nan
+    scale = float(np.mean(np.abs(train[MASE_SEASON:] - train[:-MASE_SEASON])))
+    return scale if scale > 0 else np.nan
+
+
+def build_ets_grid(n_obs: int, horizon: int, n_folds: int = 1) -> List[dict]:
+    """
+    Holt-Winters / ETS candidates: none / additive / damped trend x none / additive /
+    multiplicative season, with weekly periods and yearly ones when the shortest backtest
+    training window (`n_obs - n_folds * horizon`) still covers two full years.
+    """
+    trends = [(None, False), ('add', False), ('add', True)]
+    periods = [7] + ([365] if n_obs - n_folds * horizon >= 2 * 365 else [])
+
+    grid = [{'trend': t, 'damped_trend': d, 'seasonal': None, 'seasonal_periods': None} for t, d in trends]
+    for period in periods:
+        for seasonal in ('add', 'mul'):
+            grid += [{'trend': t, 'damped_trend': d, 'seasonal': seasonal, 'seasonal_periods': period} for t, d in trends]
+    return grid
+
+
+def _fit_forecast(train: np.ndarray, config: dict, horizon: int) -> np.ndarray:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        model = ExponentialSmoothing(train, **config).fit()
+    return np.asarray(model.forecast(horizon))
+
+
+def _score_config(values: np.ndarray, config: dict, horizon: int, n_folds: int, scale: float) -> dict:
+    """
+    Rolling-origin backtest: refits on an expanding window and forecasts the next `horizon` days,
+    `n_folds` times. MAPE ignores zero-revenue days (e.g. closed weekdays); MASE divides by
+    the series-level `scale` from `mase_scale`, identical for every candidate.
+    """
+    errors_all, ape = [], []
+    try:
+        for fold in range(n_folds, 0, -1):
+            origin = len(values) - fold * horizon
+            train, actual = values[:origin], values[origin:origin + horizon]
+            pred = _fit_forecast(train, config, len(actual))
+            if not np.all(np.isfinite(pred)):
+                raise ValueError("non-finite forecast")
+
+            errors = np.abs(actual - pred)
+            nonzero = actual != 0
+            ape.append(errors[nonzero] / np.abs(actual[nonzero]))
+            errors_all.append(errors)
+
+        mape = float(np.mean(np.concatenate(ape))) * 100 if ape else np.nan
+        mase = float(np.mean(np.concatenate(errors_all))) / scale
+    except Exception:
+        # Invalid candidate for this series (e.g. multiplicative season with zero days)
+        mape, mase = np.inf, np.inf
+    return {**config, 'MAPE': mape, 'MASE': mase}
+
+
+def _backtest_worker(shm_name: str, length: int, config: dict, horizon: int, n_folds: int, scale: float) -> dict:
+    """Process-pool entry point: reads the daily series from shared memory instead of a pickled copy."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        values = np.ndarray((length,), dtype=np.float64, buffer=shm.buf).copy()
+    finally:
+        shm.close()
+    return _score_config(values, config, horizon, n_folds, scale)
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Lazily started process pool (spawn: safe to use from Streamlit's threaded server)."""
+    global _POOL
+    with _SELECTION_LOCK:
+        if _POOL is None:
+            _POOL = ProcessPoolExecutor(
+                max_workers=os.cpu_count() or 1, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _POOL
+
+
+def select_model(series: pd.Series, horizon: int = 30, n_folds: int = 3, parallel: bool = True) -> dict:
+    """
+    Backtests every configuration of `build_ets_grid` in parallel and returns the winner (lowest MASE).
+
+    Returns a dict with the winning 'config', its 'MAPE' / 'MASE', and all 'candidates'.
+    Results are cached per series content and horizon.
+    """
+    values = np.ascontiguousarray(series.to_numpy(dtype=np.float64))
+    cache_key = (hashlib.sha1(values.tobytes()).hexdigest(), str(series.index[0]), horizon, n_folds)
+    with _SELECTION_LOCK:
+        if cache_key in _SELECTION_CACHE:
+            return _SELECTION_CACHE[cache_key]
+
+    n_folds = backtest_folds(len(values), horizon, n_folds)
+    scale = mase_scale(values, horizon, n_folds)
+    grid = build_ets_grid(len(values), horizon, n_folds)
+
+    if parallel and len(grid) > 1:
+        shm = shared_memory.SharedMemory(create=True, size=values.nbytes)
+        try:
+            np.ndarray(values.shape, dtype=values.dtype, buffer=shm.buf)[:] = values
+            pool = _get_pool()
+            futures = [pool.submit(_backtest_worker, shm.name, len(values), config, horizon, n_folds, scale)
+                       for config in grid]
+            scores = [future.result() for future in futures]
+        finally:
+            shm.close()
+            shm.unlink()
+    else:
+        scores = [_score_config(values, config, horizon, n_folds, scale) for config in grid]
+
+    candidates = pd.DataFrame(scores).sort_values(['MASE', 'MAPE']).reset_index(drop=True)
+    best = candidates.iloc[0]
+    result = {
+        'config': {key: best[key] for key in DEFAULT_ETS_CONFIG},
+        'MAPE': float(best['MAPE']),
+        'MASE': float(best['MASE']),
+        'candidates': candidates,
+    }
+    # pandas turns None into NaN inside the candidates frame; restore the statsmodels arguments
+    result['config'] = {key: (None if pd.isna(value) else value) for key, value in result['config'].items()}
+    result['config']['damped_trend'] = bool(result['config']['damped_trend'])
+    if result['config']['seasonal_periods'] is not None:
+        result['config']['seasonal_periods'] = int(result['config']['seasonal_periods'])
+
+    with _SELECTION_LOCK:
+        _SELECTION_CACHE[cache_key] = result
+    return result
+
 class TimeSeriesForecaster:
     """
     Handles Time Series Analysis and Forecasting.
@@ -12,36 +174,51 @@ class TimeSeriesForecaster:
 
     def __init__(self, df: pd.DataFrame):
         self.df = df
+        self.model_report: Optional[dict] = None
 
     def prepare_time_series(self) -> pd.DataFrame:
         """
         Aggregates daily sales data for time series modeling.
         """
-        ts_data = self.df.copy()
-        ts_data['Date'] = ts_data[COL_MAPPING['invoice_date']].dt.date
-        daily_sales = ts_data.groupby('Date')['TotalAmount'].sum().reset_index()
-        daily_sales['Date'] = pd.to_datetime(daily_sales['Date'])
-        daily_sales.set_index('Date', inplace=True)
+        # Group on normalized dates directly (no copy of the transaction table)
+        dates = self.df[COL_MAPPING['invoice_date']].dt.normalize().rename('Date')
+        daily_sales = self.df.groupby(dates)[['TotalAmount']].sum()
         
         # Resample to ensure daily continuity (fill missing days with 0)
         daily_sales = daily_sales.resample('D').sum()
         return daily_sales
 
-    def forecast_sales(self, days_ahead=30):
+    def forecast_sales(self, days_ahead=30, auto_select=False, daily_sales=None):
         """
         Predicts future sales using Exponential Smoothing.
         Returns historical data + forecast dataframe.
+
+        Args:
+            days_ahead: Forecast horizon in days.
+            auto_select: Pick the Holt-Winters/ETS configuration by rolling-origin backtests
+                (see `select_model`) instead of the fixed weekly additive model.
+            daily_sales: Pre-aggregated output of `prepare_time_series` (recomputed if omitted).
+
+        The chosen configuration and its backtest MAPE/MASE are stored in `self.model_report`.
         """
-        daily_sales = self.prepare_time_series()
+        if daily_sales is None:
+            daily_sales = self.prepare_time_series()
+        series = daily_sales['TotalAmount']
+        
+        if auto_select:
+            self.model_report = select_model(series, horizon=days_ahead)
+        else:
+            # Backtest the fixed configuration too, so accuracy is always reported
+            values = series.to_numpy(dtype=np.float64)
+            n_folds = backtest_folds(len(values), days_ahead)
+            scale = mase_scale(values, days_ahead, n_folds)
+            scores = _score_config(values, DEFAULT_ETS_CONFIG, days_ahead, n_folds, scale)
+            self.model_report = {'config': dict(DEFAULT_ETS_CONFIG), 'MAPE': scores['MAPE'], 'MASE': scores['MASE']}
         
-        # Train Model (Holt-Winters with Trend and Seasonality)
-        # Assuming weekly seasonality (period=7)
-        model = ExponentialSmoothing(
-            daily_sales['TotalAmount'], 
-            trend='add', 
-            seasonal='add', 
-            seasonal_periods=7
-        ).fit()
+        # Train Model on the full history with the chosen configuration
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            model = ExponentialSmoothing(series, **self.model_report['config']).fit()
 
         # Predict
         forecast = model.forecast(days_ahead)
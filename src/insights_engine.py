@@ -31,4 +31,33 @@ def generate_business_recommendations(df_ai: pd.DataFrame) -> dict:
             
         recommendations[label] = advice
         
-    return recommendations
\ No newline at end of file
+    return recommendations
+
+def generate_anomaly_insights(revenue_scored: pd.DataFrame, cancellation_scored: pd.DataFrame,
+                              missing_months: pd.DataFrame, spend_outliers: pd.DataFrame) -> dict:
+    """
+    Turns the anomaly detector output into alert cards.
+    Returns a dictionary mapping Alert Title -> Advice String (empty when nothing is flagged).
+    """
+    alerts = {}
+
+    if not missing_months.empty:
+        months = ", ".join(missing_months['Month'])
+        alerts["Data Gap Detected"] = f"🧩 **Data Quality:** No transactions for {months}. Check that every monthly ERP export was uploaded before trusting trends."
+
+    revenue_flags = revenue_scored[revenue_scored['Is_Anomaly']]
+    if not revenue_flags.empty:
+        latest = revenue_flags.iloc[-1]
+        day = revenue_flags.index[-1].strftime('%Y-%m-%d')
+        alerts["Revenue Anomalies"] = f"📉 **Revenue Watch:** {len(revenue_flags)} abnormal days. Latest: {latest['Direction'].lower()} on {day} (${latest['Value']:,.0f} vs ${latest['Expected']:,.0f} expected)."
+
+    cancellation_surges = cancellation_scored[cancellation_scored['Is_Anomaly'] & (cancellation_scored['Direction'] == 'Spike')]
+    if not cancellation_surges.empty:
+        day = cancellation_surges.index[-1].strftime('%Y-%m-%d')
+        alerts["Cancellation Surge"] = f"↩️ **Returns Alert:** {len(cancellation_surges)} days with unusual cancellation volume (latest {day}). Review product quality and fulfilment for those dates."
+
+    high_spenders = spend_outliers[spend_outliers['Spend_Z'] > 0]
+    if not high_spenders.empty:
+        alerts["Spend Outliers"] = f"🔎 **Customer Watch:** {len(high_spenders)} customers spend far above the norm. Verify they are genuine (not wholesale or test accounts) before they skew segment averages."
+
+    return alerts
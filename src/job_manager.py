@@ -0,0 +1,163 @@
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+import streamlit as st
+
+from src.data_loader import iter_file_chunks
+from src.preprocessor import DataPreprocessor
+from src.validator import DataValidator
+
+
+class UploadJob:
+    """
+    Tracks a single background parsing + preprocessing job.
+    Progress fields are written by the worker thread and polled by the UI.
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    def __init__(self, job_id: str, filenames: List[str]):
+        self.job_id = job_id
+        self.filenames = filenames
+        self.status = UploadJob.PENDING
+        self.progress = 0.0
+        self.rows_loaded = 0
+        self.message = "Queued"
+        self.result: Optional[Dict[str, pd.DataFrame]] = None
+        self.error: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (UploadJob.DONE, UploadJob.FAILED)
+
+
+class UploadJobManager:
+    """
+    Process-wide worker pool for ERP uploads.
+    Jobs are keyed by the SHA-256 of the uploaded bytes, so re-uploading the same
+    export (from any session) reuses the finished job instead of parsing again.
+    Finished tables are handed over to the dataset store with `take_result`; after
+    that the job cache only keeps the id and status, and the store owns the data.
+    """
+
+    def __init__(self, max_workers: int = 4, max_cached_jobs: int = 16, chunksize: int = 50_000):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="aynovax-upload")
+        self.max_cached_jobs = max_cached_jobs
+        self.chunksize = chunksize
+        self._jobs: "OrderedDict[str, UploadJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def content_hash(files: List[Tuple[str, bytes]]) -> str:
+        """Stable fingerprint of a batch of (filename, content) pairs."""
+        digest = hashlib.sha256()
+        for name, content in sorted(files):
+            digest.update(name.encode("utf-8"))
+            digest.update(hashlib.sha256(content).digest())
+        return digest.hexdigest()
+
+    def submit(self, files: List[Tuple[str, bytes]]) -> UploadJob:
+        """
+        Returns the job for this batch, scheduling it only if it is not already
+        running or cached. Failures are cached too: the same bytes fail the same way.
+        """
+        job_id = self.content_hash(files)
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                self._jobs.move_to_end(job_id)
+                return job
+
+            job = UploadJob(job_id, [name for name, _ in files])
+            self._jobs[job_id] = job
+            self._evict()
+
+        self.executor.submit(self._run, job, files)
+        return job
+
+    def get(self, job_id: str) -> Optional[UploadJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def take_result(self, job_id: str) -> Optional[Dict[str, pd.DataFrame]]:
+        """
+        Returns the finished tables and drops the job's reference to them.
+        Returns None if they were already handed over (the caller should `forget` and resubmit).
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            result, job.result = job.result, None
+            return result
+
+    def forget(self, job_id: str):
+        """Removes a job so the next submit of the same bytes parses them again."""
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def _evict(self):
+        """Drops the oldest finished jobs once the cache is over capacity."""
+        finished = [key for key, job in self._jobs.items() if job.finished]
+        while len(self._jobs) > self.max_cached_jobs and finished:
+            self._jobs.pop(finished.pop(0))
+
+    def _run(self, job: UploadJob, files: List[Tuple[str, bytes]]):
+        """Worker body: stream-parse every file, then run the preprocessing pipeline."""
+        job.status = UploadJob.RUNNING
+        try:
+            total_bytes = sum(len(content) for _, content in files) or 1
+            bytes_done = 0
+            all_dfs = []
+
+            for name, content in files:
+                job.message = f"Parsing {name}"
+                buffer = io.BytesIO(content)
+                file_chunks = []
+                mapping = None
+                for chunk in iter_file_chunks(buffer, name, chunksize=self.chunksize):
+                    if mapping is None:
+                        # Fast fail: reject unrecognised headers on the first chunk, before parsing the rest
+                        mapping = DataValidator.infer_column_mapping(chunk.columns)
+                    file_chunks.append(chunk)
+                    job.rows_loaded += len(chunk)
+                    # Parsing accounts for 90% of the bar; position is approximate for CSV
+                    # because the reader buffers ahead of the rows it has yielded.
+                    done = bytes_done + min(buffer.tell(), len(content))
+                    job.progress = 0.9 * done / total_bytes
+
+                # Align headers per file so exports with renamed columns merge cleanly
+                df = pd.concat(file_chunks, ignore_index=True).rename(columns=mapping)
+                # Add Metadata for Audit (Which file did this row come from?)
+                df['Source_File'] = name
+                all_dfs.append(df)
+                bytes_done += len(content)
+
+            job.message = "Preprocessing"
+            job.progress = 0.9
+            master_df = pd.concat(all_dfs, ignore_index=True)
+            processor = DataPreprocessor(master_df)
+            df_clean = processor.preprocess()
+
+            job.result = {"transactions": df_clean, "cancellations": processor.cancellations}
+            job.progress = 1.0
+            job.message = "Completed"
+            job.status = UploadJob.DONE
+        except Exception as e:
+            job.error = str(e)
+            job.message = "Failed"
+            job.status = UploadJob.FAILED
+
+
+@st.cache_resource(show_spinner=False)
+def get_job_manager() -> UploadJobManager:
+    """Single job manager shared by every Streamlit session in this process."""
+    return UploadJobManager()
@@ -1,6 +1,7 @@
 import pandas as pd
 import numpy as np
 from utils.constants import COL_MAPPING
+from src.validator import DataValidator
 
 class DataPreprocessor:
     """
@@ -9,17 +10,24 @@ class DataPreprocessor:
 
     def __init__(self, df: pd.DataFrame):
         self.df = df
+        # Cancellation lines removed by preprocess(), kept for anomaly monitoring
+        self.cancellations = pd.DataFrame()
+        # Audit counters filled by preprocess()
+        self.duplicates_removed = 0
+        self.unmatched_cancellations = 0
+        self.unallocated_return_amount = 0.0
 
     def preprocess(self) -> pd.DataFrame:
         """
         Executes the full preprocessing pipeline.
         
         Steps:
+        0. Validate schema and parse types (rejects bad files early).
         1. Remove null CustomerIDs (Crucial for RFM).
-        2. Remove duplicates.
+        2. Remove duplicates (also across Source_File batches).
         3. Handle cancellations (Quantity < 0).
-        4. Calculate TotalPrice.
-        5. Type conversion.
+        4. Calculate TotalAmount.
+        5. Net cancellations against their original invoice lines.
 
         Returns:
             pd.DataFrame: Cleaned and enriched dataset.
@@ -27,27 +35,127 @@ class DataPreprocessor:
         if self.df is None or self.df.empty:
             return pd.DataFrame()
 
-        # 1. Create a copy to avoid SettingWithCopyWarning
-        df_clean = self.df.copy()
+        # 0. Validation & Schema Inference
+        # Maps renamed headers, parses dates with one detected format and raises
+        # SchemaValidationError before any heavy transformation.
+        df_valid = DataValidator(self.df).validate()
 
-        # 2. Handling Missing Values
-        # For RFM, we cannot use transactions without a CustomerID
-        df_clean.dropna(subset=[COL_MAPPING['customer_id']], inplace=True)
+        # 1. Handling Missing Values
+        # For RFM, we cannot use transactions without a CustomerID (or a parseable date).
+        # dropna already returns a new frame, so no defensive full copy of the raw data is needed.
+        df_clean = df_valid.dropna(subset=[COL_MAPPING['customer_id'], COL_MAPPING['invoice_date']])
 
-        # 3. Data Types Conversion
+        # Data Types Conversion
         # Ensure CustomerID is treated as a string/category, not a number
         df_clean[COL_MAPPING['customer_id']] = df_clean[COL_MAPPING['customer_id']].astype(str)
-        
-        # Ensure Date is datetime
-        df_clean[COL_MAPPING['invoice_date']] = pd.to_datetime(df_clean[COL_MAPPING['invoice_date']])
 
-        # 4. Filter Cancellations and Bad Data
+        # 2. Duplicate Removal
+        # Remove exact duplicate lines (e.g. overlapping batch uploads)
+        df_clean = self._drop_duplicate_lines(df_clean)
+
+        # 3. Filter Cancellations and Bad Data
         # We are interested in sales, so we filter out negative quantities
+        # (but keep the cancellations aside so surges in returns remain visible)
+        self.cancellations = df_clean[df_clean[COL_MAPPING['quantity']] < 0]
         df_clean = df_clean[df_clean[COL_MAPPING['quantity']] > 0]
         df_clean = df_clean[df_clean[COL_MAPPING['price']] > 0]
 
-        # 5. Feature Engineering
+        # 4. Feature Engineering
         # Calculate Total Amount per line item
         df_clean['TotalAmount'] = df_clean[COL_MAPPING['quantity']] * df_clean[COL_MAPPING['price']]
 
-        return df_clean
\ No newline at end of file
+        # 5. Net Revenue Reconciliation
+        # Returns ("C" invoices) are subtracted from the purchase they reverse
+        df_clean = self._reconcile_cancellations(df_clean, self.cancellations)
+
+        return df_clean
+
+    def _drop_duplicate_lines(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Vectorized hash-based deduplication.
+        Each line is reduced to one 64-bit hash of every column except 'Source_File',
+        so the same line exported in two overlapping batches is kept only once.
+        """
+        key_cols = [col for col in df.columns if col != 'Source_File']
+        row_hashes = pd.util.hash_pandas_object(df[key_cols], index=False)
+        duplicated = row_hashes.duplicated().to_numpy()
+        self.duplicates_removed = int(duplicated.sum())
+        return df[~duplicated] if self.duplicates_removed else df
+
+    def _reconcile_cancellations(self, sales: pd.DataFrame, cancellations: pd.DataFrame) -> pd.DataFrame:
+        """
+        Matches every cancelled line to the latest earlier purchase of the same product by the
+        same customer (sorted merge-asof join) and nets the returned amount from that line.
+        When a return is worth more than the matched line, the excess is carried back to the
+        previous purchase of the same (CustomerID, StockCode), and so on.
+
+        Adds 'ReturnedAmount' and turns 'TotalAmount' into net revenue. Returns of purchases made
+        before the data window cannot be matched; they are counted in `unmatched_cancellations`,
+        and any excess left after the earliest purchase is summed in `unallocated_return_amount`.
+        Apart from the two sorts, each pass is linear in the number of lines; extra passes
+        only touch the lines that overflowed.
+        """
+        date_col = COL_MAPPING['invoice_date']
+        keys = [COL_MAPPING['customer_id'], COL_MAPPING['stock_code']]
+
+        sales = sales.assign(ReturnedAmount=0.0)
+        if cancellations.empty or sales.empty:
+            return sales
+
+        returns = cancellations[[date_col] + keys].assign(
+            _amount=-cancellations[COL_MAPPING['quantity']] * cancellations[COL_MAPPING['price']]
+        )
+        purchases = sales[[date_col] + keys].assign(_line=np.arange(len(sales)))
+
+        # merge_asof needs identical key dtypes on both sides
+        for col in keys:
+            returns[col] = returns[col].astype(str)
+            purchases[col] = purchases[col].astype(str)
+
+        # Chronological position of every purchase line (used to walk back to earlier purchases)
+        purchase_keys = purchases[keys].reset_index(drop=True)
+        purchases = purchases.sort_values(date_col, kind='stable')
+        purchases['_seq'] = np.arange(len(purchases))
+        seq_of_line = np.empty(len(sales), dtype=np.int64)
+        seq_of_line[purchases['_line'].to_numpy()] = purchases['_seq'].to_numpy()
+        by_seq = purchases[['_seq', '_line'] + keys]
+
+        matched = pd.merge_asof(
+            returns.sort_values(date_col, kind='stable'),
+            purchases,
+            on=date_col,
+            by=keys,
+            direction='backward'
+        )
+        found = matched['_line'].notna().to_numpy()
+        self.unmatched_cancellations = int((~found).sum())
+
+        line_value = sales['TotalAmount'].to_numpy()
+        returned = np.zeros(len(sales))
+        pending = matched.loc[found, ['_line', '_amount']]
+
+        while not pending.empty:
+            # Sum returns per purchase line, capped at what the line was worth
+            returned += np.bincount(
+                pending['_line'].to_numpy(dtype=np.int64),
+                weights=pending['_amount'].to_numpy(dtype=float),
+                minlength=len(sales)
+            )
+            overflow = returned - line_value
+            over_lines = np.flatnonzero(overflow > 1e-9)
+            if over_lines.size == 0:
+                break
+            returned[over_lines] = line_value[over_lines]
+
+            # Carry the excess back to the previous purchase of the same customer & product
+            carry = purchase_keys.iloc[over_lines].assign(
+                _seq=seq_of_line[over_lines] - 1, _amount=overflow[over_lines]
+            ).sort_values('_seq')
+            rematched = pd.merge_asof(carry, by_seq, on='_seq', by=keys, direction='backward')
+            carried = rematched['_line'].notna().to_numpy()
+            self.unallocated_return_amount += float(rematched.loc[~carried, '_amount'].sum())
+            pending = rematched.loc[carried, ['_line', '_amount']]
+
+        sales['ReturnedAmount'] = returned
+        sales['TotalAmount'] = sales['TotalAmount'] - returned
+        return sales
\ No newline at end of file
@@ -0,0 +1,147 @@
+import re
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+from utils.constants import (
+    COL_MAPPING, COL_ALIASES, REQUIRED_COLUMNS, DATE_FORMATS, MIN_INVOICE_DATE, MAX_FUTURE_DAYS
+)
+
+
+class SchemaValidationError(ValueError):
+    """Raised when an input file cannot be mapped onto the expected transaction schema."""
+
+
+def _normalize_header(name) -> str:
+    """'Invoice No.' -> 'invoiceno' (case, spaces and punctuation are ignored)."""
+    return re.sub(r'[^a-z0-9]', '', str(name).lower())
+
+
+class DataValidator:
+    """
+    Validation & schema-inference stage, run before any expensive transformation.
+    Maps headers onto COL_MAPPING, detects the date format once, and type/range-checks
+    every required column so bad files are rejected up front instead of failing deep in RFM.
+    """
+
+    def __init__(self, df: pd.DataFrame, sample_size: int = 500, max_invalid_ratio: float = 0.05):
+        self.df = df
+        self.sample_size = sample_size
+        self.max_invalid_ratio = max_invalid_ratio
+        self.date_format: Optional[str] = None
+
+    @staticmethod
+    def infer_column_mapping(columns: Iterable) -> Dict[str, str]:
+        """
+        Returns {source header -> canonical header} for every recognised column.
+        Raises SchemaValidationError if a required column has no match.
+        """
+        alias_lookup = {}
+        for key, aliases in COL_ALIASES.items():
+            for alias in [COL_MAPPING[key]] + aliases:
+                alias_lookup.setdefault(_normalize_header(alias), key)
+
+        # Exact canonical headers win over aliases when a file contains both
+        canonical = set(COL_MAPPING.values())
+        columns = list(columns)
+        mapping, found = {}, set()
+        for column in sorted(columns, key=lambda c: c not in canonical):
+            key = alias_lookup.get(_normalize_header(column))
+            if key is not None and key not in found:
+                mapping[column] = COL_MAPPING[key]
+                found.add(key)
+
+        missing = [COL_MAPPING[key] for key in REQUIRED_COLUMNS if key not in found]
+        if missing:
+            raise SchemaValidationError(
+                f"Missing required columns: {', '.join(missing)}. Found headers: {', '.join(map(str, columns))}"
+            )
+        return mapping
+
+    def detect_date_format(self, values: pd.Series) -> Optional[str]:
+        """
+        Picks the format in DATE_FORMATS that parses the most values of an evenly spaced sample
+        (ties go to the earlier format). It is accepted if it parses at least
+        `1 - max_invalid_ratio` of the sample; the remaining bad rows are left to `validate`.
+        Returns None if the column is already datetime.
+        """
+        if pd.api.types.is_datetime64_any_dtype(values):
+            return None
+
+        non_null = values.dropna()
+        if non_null.empty:
+            raise SchemaValidationError(f"Column '{COL_MAPPING['invoice_date']}' is empty.")
+
+        positions = np.unique(np.linspace(0, len(non_null) - 1, min(self.sample_size, len(non_null))).astype(int))
+        sample = non_null.iloc[positions].astype(str).str.strip()
+
+        best_format, best_share = None, 0.0
+        for fmt in DATE_FORMATS:
+            share = pd.to_datetime(sample, format=fmt, errors='coerce').notna().mean()
+            if share > best_share:
+                best_format, best_share = fmt, share
+            if share == 1.0:
+                break
+
+        if best_format is not None and best_share >= 1 - self.max_invalid_ratio:
+            return best_format
+
+        raise SchemaValidationError(
+            f"Unrecognised date format in '{COL_MAPPING['invoice_date']}' (e.g. '{sample.iloc[0]}')."
+        )
+
+    def validate(self) -> pd.DataFrame:
+        """
+        Returns the frame with canonical headers and parsed types.
+        Invalid cells are coerced to NaN/NaT; the file is rejected if any required column
+        has more than `max_invalid_ratio` of its non-null values unparseable or out of range
+        (dates outside MIN_INVOICE_DATE .. today + MAX_FUTURE_DAYS, non-finite quantities or
+        prices, negative prices).
+        """
+        if self.df is None or self.df.empty:
+            raise SchemaValidationError("The file contains no rows.")
+
+        mapping = self.infer_column_mapping(self.df.columns)
+        df = self.df.rename(columns=mapping)
+
+        date_col = COL_MAPPING['invoice_date']
+        qty_col = COL_MAPPING['quantity']
+        price_col = COL_MAPPING['price']
+        customer_col = COL_MAPPING['customer_id']
+
+        # 1. Type conversion with explicit formats (no per-element inference)
+        self.date_format = self.detect_date_format(df[date_col])
+        raw = {col: df[col] for col in (date_col, qty_col, price_col)}
+        if self.date_format is not None:
+            df[date_col] = pd.to_datetime(df[date_col].astype(str).str.strip(), format=self.date_format, errors='coerce')
+        for col in (qty_col, price_col):
+            if not pd.api.types.is_numeric_dtype(df[col]):
+                df[col] = pd.to_numeric(df[col], errors='coerce')
+
+        # 2. Vectorized type & range checks, all collected before failing
+        dates = df[date_col]
+        if dates.dt.tz is not None:
+            dates = dates.dt.tz_convert(None)
+        max_date = pd.Timestamp.now().normalize() + pd.Timedelta(days=MAX_FUTURE_DAYS + 1)
+        out_of_window = (dates < pd.Timestamp(MIN_INVOICE_DATE)) | (dates >= max_date)
+        non_finite_qty = np.isinf(df[qty_col])
+        checks = {
+            date_col: (df[date_col].isna() & raw[date_col].notna()) | out_of_window,
+            qty_col: (df[qty_col].isna() & raw[qty_col].notna()) | non_finite_qty,
+            price_col: (df[price_col].isna() & raw[price_col].notna()) | np.isinf(df[price_col]) | (df[price_col] < 0),
+        }
+        problems = []
+        for col, invalid in checks.items():
+            ratio = invalid.sum() / max(raw[col].notna().sum(), 1)
+            if ratio > self.max_invalid_ratio:
+                problems.append(f"'{col}' has {ratio:.1%} invalid or out-of-range values")
+        if df[customer_col].isna().all():
+            problems.append(f"'{customer_col}' is empty")
+
+        if problems:
+            raise SchemaValidationError("File rejected: " + "; ".join(problems) + ".")
+
+        # Tolerated out-of-range values are coerced like unparseable ones (dropped downstream)
+        df.loc[out_of_window, date_col] = pd.NaT
+        df.loc[non_finite_qty, qty_col] = np.nan
+        return df
@@ -1,15 +1,20 @@
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+from src.chart_data import chart_cache, frame_fingerprint, segment_counts, segment_revenue
+from utils.constants import CHART_TEXT
 
 class DashboardCharts:
     """
     Generates interactive Plotly charts for the Streamlit dashboard.
     Includes error handling to prevent app crashes.
+    Segment and cluster charts are served from the process-wide chart cache, keyed on
+    a fingerprint of the columns they read plus the display language.
     """
 
-    def __init__(self, df: pd.DataFrame):
+    def __init__(self, df: pd.DataFrame, lang: str = "EN"):
         self.df = df
+        self.lang = lang
 
     def _create_empty_figure(self, message: str) -> go.Figure:
         """Helper to return an empty figure with an error message."""
@@ -27,20 +32,22 @@ class DashboardCharts:
             if 'Customer_Segment' not in self.df.columns:
                 return self._create_empty_figure("Column 'Customer_Segment' missing")
 
-            segment_counts = self.df['Customer_Segment'].value_counts().reset_index()
-            segment_counts.columns = ['Segment', 'Count']
+            fingerprint = frame_fingerprint(self.df, ['Customer_Segment'])
 
-            fig = px.bar(
-                segment_counts, 
-                x='Segment', 
-                y='Count', 
-                title='Customer Distribution by Segment',
-                color='Segment',
-                text='Count'
-            )
-            fig.update_traces(textposition='outside')
-            fig.update_layout(showlegend=False, height=500)
-            return fig
+            def build():
+                fig = px.bar(
+                    segment_counts(self.df, fingerprint), 
+                    x='Segment', 
+                    y='Count', 
+                    title=CHART_TEXT['segment_distribution'][self.lang],
+                    color='Segment',
+                    text='Count'
+                )
+                fig.update_traces(textposition='outside')
+                fig.update_layout(showlegend=False, height=500)
+                return fig
+
+            return chart_cache.figure(("segment_distribution", fingerprint, self.lang), build)
             
         except Exception as e:
             return self._create_empty_figure(f"Chart Error: {str(e)}")
@@ -78,17 +85,20 @@ class DashboardCharts:
             if 'Customer_Segment' not in self.df.columns or 'Monetary' not in self.df.columns:
                  return self._create_empty_figure("Missing Columns for Revenue Chart")
 
-            segment_rev = self.df.groupby('Customer_Segment')['Monetary'].sum().reset_index()
-            
-            fig = px.pie(
-                segment_rev, 
-                values='Monetary', 
-                names='Customer_Segment', 
-                title='Share of Total Revenue by Segment',
-                hole=0.4
-            )
-            fig.update_traces(textinfo='percent+label')
-            return fig
+            fingerprint = frame_fingerprint(self.df, ['Customer_Segment', 'Monetary'])
+
+            def build():
+                fig = px.pie(
+                    segment_revenue(self.df, fingerprint), 
+                    values='Monetary', 
+                    names='Customer_Segment', 
+                    title=CHART_TEXT['revenue_share'][self.lang],
+                    hole=0.4
+                )
+                fig.update_traces(textinfo='percent+label')
+                return fig
+
+            return chart_cache.figure(("revenue_share", fingerprint, self.lang), build)
             
         except Exception as e:
             # Fallback in case of unexpected errors (e.g., all zeros)
@@ -100,28 +110,33 @@ class DashboardCharts:
             if df_ai is None or df_ai.empty:
                 return self._create_empty_figure("No AI Data Available")
 
-            fig = px.scatter_3d(
-                df_ai,
-                x='Recency',
-                y='Frequency',
-                z='Monetary',
-                color='Cluster_Label',
-                opacity=0.7,
-                size_max=20,
-                hover_data=['Recency', 'Frequency', 'Monetary'],
-                title='3D AI-Driven Customer Clusters',
-                labels={'Cluster_Label': 'Customer Group'}
-            )
-            fig.update_layout(
-                margin=dict(l=0, r=0, b=0, t=30),
-                scene=dict(
-                    xaxis_title='Recency',
-                    yaxis_title='Frequency',
-                    zaxis_title='Monetary'
-                ),
-                height=700
-            )
-            return fig
+            fingerprint = frame_fingerprint(df_ai, ['Recency', 'Frequency', 'Monetary', 'Cluster_Label'])
+
+            def build():
+                fig = px.scatter_3d(
+                    df_ai,
+                    x='Recency',
+                    y='Frequency',
+                    z='Monetary',
+                    color='Cluster_Label',
+                    opacity=0.7,
+                    size_max=20,
+                    hover_data=['Recency', 'Frequency', 'Monetary'],
+                    title=CHART_TEXT['clusters_3d'][self.lang],
+                    labels={'Cluster_Label': 'Customer Group'}
+                )
+                fig.update_layout(
+                    margin=dict(l=0, r=0, b=0, t=30),
+                    scene=dict(
+                        xaxis_title='Recency',
+                        yaxis_title='Frequency',
+                        zaxis_title='Monetary'
+                    ),
+                    height=700
+                )
+                return fig
+
+            return chart_cache.figure(("clusters_3d", fingerprint, self.lang), build)
             
         except Exception as e:
             return self._create_empty_figure(f"3D Chart Error: {str(e)}")
\ No newline at end of file
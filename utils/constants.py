@@ -40,4 +40,59 @@ COL_MAPPING = {
     "price": "UnitPrice",
     "customer_id": "CustomerID",
     "country": "Country"
-}
\ No newline at end of file
+}
+
+# Known header aliases per canonical column (matched case/punctuation-insensitively).
+# Lets ERP exports with renamed headers be mapped onto COL_MAPPING automatically.
+COL_ALIASES = {
+    "invoice": ["InvoiceNo", "Invoice", "Invoice No", "InvoiceNumber", "Invoice ID", "OrderID", "Order No"],
+    "stock_code": ["StockCode", "Stock Code", "SKU", "ProductCode", "Product ID", "ItemCode"],
+    "description": ["Description", "Product", "ProductName", "Item Description"],
+    "quantity": ["Quantity", "Qty", "Units", "Quantity Ordered"],
+    "invoice_date": ["InvoiceDate", "Invoice Date", "Date", "OrderDate", "TransactionDate"],
+    "price": ["UnitPrice", "Unit Price", "Price", "Price Each", "Unit Cost"],
+    "customer_id": ["CustomerID", "Customer ID", "Customer", "ClientID", "Customer Number"],
+    "country": ["Country", "Region", "Market"]
+}
+
+# Columns without which the pipeline cannot run (description/country are informational)
+REQUIRED_COLUMNS = ["invoice", "stock_code", "quantity", "invoice_date", "price", "customer_id"]
+
+# Candidate date formats tried (in order) against a sample of the InvoiceDate column.
+# Month-first comes before day-first: it is the convention of the reference dataset.
+DATE_FORMATS = [
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d %H:%M",
+    "%Y-%m-%d",
+    "%m/%d/%Y %H:%M:%S",
+    "%m/%d/%Y %H:%M",
+    "%m/%d/%Y",
+    "%d/%m/%Y %H:%M:%S",
+    "%d/%m/%Y %H:%M",
+    "%d/%m/%Y",
+    "%d.%m.%Y %H:%M",
+    "%d.%m.%Y",
+    "%Y/%m/%d %H:%M",
+    "%Y/%m/%d"
+]
+
+# Plausible InvoiceDate window: earlier dates (e.g. 1970 epoch fallbacks) or dates more than
+# MAX_FUTURE_DAYS ahead almost always come from a misread date format
+MIN_INVOICE_DATE = "1990-01-01"
+MAX_FUTURE_DAYS = 1
+
+# Chart titles (part of the figure cache key, so each language is rendered once)
+CHART_TEXT = {
+    "segment_distribution": {
+        "EN": "Customer Distribution by Segment",
+        "ES": "Distribución de Clientes por Segmento"
+    },
+    "revenue_share": {
+        "EN": "Share of Total Revenue by Segment",
+        "ES": "Participación en Ingresos por Segmento"
+    },
+    "clusters_3d": {
+        "EN": "3D AI-Driven Customer Clusters",
+        "ES": "Clústeres de Clientes 3D (IA)"
+    }
+}